@@ -0,0 +1,136 @@
+"""Multi-Port-Benchmark für den Ingest.
+
+Legt N pty-Paare an (simulierte ESPs), startet `python main.py` mit
+INGEST_PORTS auf die pty-Slaves und Datenbank-Logging in ein Temp-Verzeichnis,
+füttert jeden Port mit eigenem Datenstrom und prüft über /ws?auto=<id>,
+dass jeder Abonnent nur die Daten seines Autos bekommt.
+
+Aufruf:
+    python bench_ingest.py [--ports 8] [--seconds 10] [--rate 50]
+"""
+import argparse
+import asyncio
+import json
+import os
+import pty
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import websockets
+
+HOST = "127.0.0.1"
+PORT = 5000
+
+
+def _feeder(master_fd: int, auto_id: int, rate: float, stop: threading.Event, sent: dict):
+    # RPM kodiert die Auto-ID (auto_id * 1000 + x), damit Vermischung auffällt
+    i = 0
+    while not stop.is_set():
+        os.write(master_fd, f"{auto_id * 1000 + i % 500}:{i % 200}:90/".encode())
+        i += 1
+        sent[auto_id] = i
+        time.sleep(1 / rate)
+
+
+async def _subscribe(auto_id: int, seconds: float) -> dict:
+    frames = mixed = 0
+    async with websockets.connect(f"ws://{HOST}:{PORT}/ws?auto={auto_id}") as ws:
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            data = json.loads(await ws.recv())
+            frames += 1
+            rpm = int(data["RPM"])
+            if data.get("AUTO_ID") != auto_id or (rpm and rpm // 1000 != auto_id):
+                mixed += 1
+    return {"frames": frames, "mixed": mixed}
+
+
+async def _subscribe_all(auto_ids, seconds):
+    return await asyncio.gather(*(_subscribe(a, seconds) for a in auto_ids))
+
+
+def _process_cpu(pid: int) -> float:
+    """CPU-Zeit (user + system) eines Prozesses in Sekunden aus /proc."""
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def _wait_for_port(deadline: float) -> bool:
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((HOST, PORT), timeout=0.05):
+                return True
+        except OSError:
+            time.sleep(0.01)
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ports", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--rate", type=float, default=50.0, help="Samples pro Sekunde und Port")
+    args = parser.parse_args()
+
+    auto_ids = list(range(1, args.ports + 1))
+    ptys = {auto_id: pty.openpty() for auto_id in auto_ids}
+    ingest_ports = ",".join(f"{a}={os.ttyname(slave)}" for a, (_, slave) in ptys.items())
+
+    tmp = tempfile.mkdtemp(prefix="bench_ingest_")
+    env = dict(os.environ, INGEST_PORTS=ingest_ports, DB_LOGGING="1", DATABASE_URL=f"{tmp}/app.db")
+    proc = subprocess.Popen(
+        [sys.executable, "main.py"],
+        cwd=Path(__file__).parent,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    stop = threading.Event()
+    sent = {}
+    try:
+        if not _wait_for_port(time.monotonic() + 20):
+            raise RuntimeError("Backend hat den Port nicht rechtzeitig geöffnet")
+        # Leerlauf: Ports offen, aber es kommen keine Daten und niemand hört zu
+        time.sleep(1.0)
+        idle_start, idle_cpu = time.monotonic(), _process_cpu(proc.pid)
+        time.sleep(args.seconds / 2)
+        idle_percent = (_process_cpu(proc.pid) - idle_cpu) * 100 / (time.monotonic() - idle_start)
+
+        for auto_id, (master, _) in ptys.items():
+            threading.Thread(target=_feeder, args=(master, auto_id, args.rate, stop, sent), daemon=True).start()
+
+        load_start, load_cpu = time.monotonic(), _process_cpu(proc.pid)
+        results = asyncio.run(_subscribe_all(auto_ids, args.seconds))
+        load_percent = (_process_cpu(proc.pid) - load_cpu) * 100 / (time.monotonic() - load_start)
+        stop.set()
+        time.sleep(0.5)
+
+        for auto_id, result in zip(auto_ids, results):
+            db_path = Path(f"{tmp}/app_auto{auto_id}.db")
+            rows = 0
+            if db_path.exists():
+                with sqlite3.connect(db_path) as conn:
+                    rows = conn.execute("SELECT COUNT(*) FROM logs_1sec WHERE auto_id = ?", (auto_id,)).fetchone()[0]
+            print(
+                f"Auto {auto_id}: gesendet={sent.get(auto_id, 0)} frames={result['frames']} "
+                f"({result['frames'] / args.seconds:.1f}/s) vermischt={result['mixed']} logs_1sec={rows}"
+            )
+        print(
+            f"{args.ports} Ports: Server-CPU Leerlauf {idle_percent:.1f}%, "
+            f"unter Last ({args.rate:.0f} Samples/s pro Port, {args.seconds:.0f}s) {load_percent:.1f}%"
+        )
+    finally:
+        stop.set()
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Startup-Benchmark für das Backend.
+
+Startet `python main.py` als eigenen Prozess und misst von außen:
+- Zeit bis der Port 5000 Verbindungen annimmt
+- Zeit bis der erste WebSocket-Frame ankommt
+
+Zusätzlich werden die intern gemessenen Werte von /health ausgegeben
+(Import-Zeit, Listening-Socket, erster an einen Client gesendeter Frame).
+
+Aufruf:
+    python bench_startup.py [--runs 5]
+"""
+import argparse
+import asyncio
+import json
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+import websockets
+
+HOST = "127.0.0.1"
+PORT = 5000
+
+
+def _wait_for_port(deadline: float) -> bool:
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((HOST, PORT), timeout=0.05):
+                return True
+        except OSError:
+            time.sleep(0.005)
+    return False
+
+
+async def _first_frame() -> dict:
+    async with websockets.connect(f"ws://{HOST}:{PORT}/ws") as ws:
+        return json.loads(await ws.recv())
+
+
+def run_once(timeout: float = 20.0) -> dict:
+    """Startet das Backend einmal und gibt die Messwerte zurück."""
+    start = time.monotonic()
+    proc = subprocess.Popen(
+        [sys.executable, "main.py"],
+        cwd=Path(__file__).parent,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        if not _wait_for_port(start + timeout):
+            raise RuntimeError("Backend hat den Port nicht rechtzeitig geöffnet")
+        listening = time.monotonic() - start
+        asyncio.run(_first_frame())
+        first_frame = time.monotonic() - start
+        with urllib.request.urlopen(f"http://{HOST}:{PORT}/health") as resp:
+            health = json.loads(resp.read())
+        return {
+            "listening_s": listening,
+            "first_frame_s": first_frame,
+            "server": health.get("startup", {}),
+        }
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    results = [run_once() for _ in range(args.runs)]
+    for i, r in enumerate(results, 1):
+        print(
+            f"Lauf {i}: listening={r['listening_s']:.3f}s "
+            f"first_frame={r['first_frame_s']:.3f}s server={r['server']}"
+        )
+
+    for key in ("listening_s", "first_frame_s"):
+        values = [r[key] for r in results]
+        print(f"{key}: median={statistics.median(values):.3f}s max={max(values):.3f}s")
+    for key in ("import_s", "listening_s", "first_frame_s"):
+        values = [r["server"].get(key) for r in results if r["server"].get(key) is not None]
+        if values:
+            print(f"server {key}: median={statistics.median(values):.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""Vergleich inkrementeller Sync (/api/sync) gegen Komplett-Download.
+
+Startet `python main.py` als lokalen Stand-in-Server mit einer vorbefüllten
+Datenbank, synchronisiert mit sync_client.py in eine lokale Datei und misst
+Bytes und Zeit gegen /api/database/download. Prüft außerdem die Wiederaufnahme
+nach einem Abbruch mitten im Sync - einmal über `max_batches`, einmal mit einem
+Proxy, der die TCP-Verbindung mitten in einem Batch trennt.
+
+Aufruf:
+    python bench_sync.py [--rows 86400] [--new-rows 600]
+"""
+import argparse
+import os
+import pty
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from pathlib import Path
+
+from db import DatabaseConnection
+from sync_client import sync
+
+HOST = "127.0.0.1"
+PORT = 5000
+BASE_URL = f"http://{HOST}:{PORT}"
+
+
+def _add_rows(db: DatabaseConnection, n: int) -> None:
+    with db.get_connection() as conn:
+        conn.executemany(
+            "INSERT INTO logs_1sec (auto_id, geschwindigkeit, rpm) VALUES (1, ?, ?)",
+            ((i % 180, 800 + i % 5000) for i in range(n)),
+        )
+        conn.executemany(
+            """
+            INSERT INTO logs_10sec (auto_id, coolant_temp, oil_temp, fuel_level, voltage, boost, oil_pressure)
+            VALUES (1, 90, 95, ?, 12.4, 1.1, 3.2)
+            """,
+            ((70 - i / 1000,) for i in range(n // 10)),
+        )
+
+
+def _full_download() -> tuple:
+    start = time.perf_counter()
+    with urllib.request.urlopen(f"{BASE_URL}/api/database/download?auto=1") as resp:
+        size = len(resp.read())
+    return size, time.perf_counter() - start
+
+
+def _timed_sync(local_path: str, base_url: str = BASE_URL, **kwargs) -> tuple:
+    start = time.perf_counter()
+    stats = sync(base_url, local_path, auto_id=1, **kwargs)
+    return stats, time.perf_counter() - start
+
+
+def _cutting_proxy(limit: int) -> str:
+    """Proxy für genau eine Verbindung, der nach `limit` Antwort-Bytes hart trennt."""
+    listener = socket.create_server((HOST, 0))
+
+    def run():
+        client, _ = listener.accept()
+        listener.close()
+        upstream = socket.create_connection((HOST, PORT))
+        with client, upstream:
+            upstream.sendall(client.recv(65536))  # GET-Request passt in einen recv
+            sent = 0
+            while sent < limit:
+                data = upstream.recv(min(65536, limit - sent))
+                if not data:
+                    break
+                client.sendall(data)
+                sent += len(data)
+            client.shutdown(socket.SHUT_RDWR)
+
+    threading.Thread(target=run, daemon=True).start()
+    return f"http://{HOST}:{listener.getsockname()[1]}"
+
+
+def _count(path: str, table: str) -> int:
+    with sqlite3.connect(path) as conn:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def _wait_for_port(deadline: float) -> bool:
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((HOST, PORT), timeout=0.05):
+                return True
+        except OSError:
+            time.sleep(0.01)
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=86400, help="Vorhandene logs_1sec Zeilen")
+    parser.add_argument("--new-rows", type=int, default=600, help="Neue Zeilen (eine Fahrt)")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="bench_sync_")
+    server_db = DatabaseConnection(f"{tmp}/app_auto1.db", auto_id=1)
+    _add_rows(server_db, args.rows)
+    local_path = f"{tmp}/phone.db"
+
+    # Pty statt echter UART, damit der Stand-in-Server keine Hardware braucht
+    _, slave = pty.openpty()
+    env = dict(os.environ, INGEST_PORTS=f"1={os.ttyname(slave)}", DB_LOGGING="1", DATABASE_URL=f"{tmp}/app.db")
+    proc = subprocess.Popen(
+        [sys.executable, "main.py"],
+        cwd=Path(__file__).parent,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        if not _wait_for_port(time.monotonic() + 20):
+            raise RuntimeError("Backend hat den Port nicht rechtzeitig geöffnet")
+
+        size, elapsed = _full_download()
+        print(f"Komplett-Download (initial):  {size:>10} Bytes  {elapsed * 1000:8.1f} ms")
+        stats, elapsed = _timed_sync(local_path)
+        print(f"Sync (initial):               {stats['bytes']:>10} Bytes  {elapsed * 1000:8.1f} ms  {stats['rows']} Zeilen")
+
+        _add_rows(server_db, args.new_rows)
+        size, elapsed = _full_download()
+        print(f"Komplett-Download (+Fahrt):   {size:>10} Bytes  {elapsed * 1000:8.1f} ms")
+        stats, elapsed = _timed_sync(local_path)
+        print(f"Sync (+Fahrt):                {stats['bytes']:>10} Bytes  {elapsed * 1000:8.1f} ms  {stats['rows']} Zeilen")
+
+        # Abbruch nach 2 Batches simulieren, danach fortsetzen
+        _add_rows(server_db, args.new_rows * 5)
+        partial, _ = _timed_sync(local_path, batch_size=200, max_batches=2)
+        resumed, _ = _timed_sync(local_path, batch_size=200)
+        ok = all(_count(local_path, t) == _count(server_db.db_path, t) for t in ("logs_1sec", "logs_10sec"))
+        print(
+            f"Wiederaufnahme: {partial['rows']} + {resumed['rows']} Zeilen, "
+            f"lokal == Server: {'ja' if ok else 'NEIN'}"
+        )
+
+        # Echter Verbindungsabbruch mitten in einem Batch (~70 KB Sync, Trennung nach 20 KB)
+        _add_rows(server_db, args.new_rows * 20)
+        cut, _ = _timed_sync(local_path, base_url=_cutting_proxy(20_000), batch_size=200)
+        resumed, _ = _timed_sync(local_path, batch_size=200)
+        cut_ok = not cut["done"] and cut["error"] is not None and resumed["done"] and all(
+            _count(local_path, t) == _count(server_db.db_path, t) for t in ("logs_1sec", "logs_10sec")
+        )
+        print(
+            f"Abbruch im Batch: {cut['rows']} Zeilen übernommen, Fehler={cut['error']!r}; "
+            f"fortgesetzt {resumed['rows']} Zeilen, lokal == Server: {'ja' if cut_ok else 'NEIN'}"
+        )
+        if not (ok and cut_ok):
+            sys.exit(1)
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    main()
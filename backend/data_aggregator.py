@@ -2,7 +2,7 @@ import asyncio
 import logging
 from collections import defaultdict
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional
 from dataclasses import dataclass
 import statistics
 
@@ -21,6 +21,7 @@ class RawDataPoint:
     voltage: Optional[float] = None
     boost: Optional[float] = None
     oil_pressure: Optional[float] = None
+    derived: Optional[Dict[str, float]] = None  # Werte aus der SignalPipeline
 
 
 class DataAggregator:
@@ -101,6 +102,24 @@ class DataAggregator:
         
         return result if result else None
     
+    def get_derived_average(self, seconds: float, names: Iterable[str]) -> Optional[Dict]:
+        """Berechnet Durchschnitte der gewählten abgeleiteten Signale (Alarme als Anteil aktiv)"""
+        names = set(names)
+        cutoff = datetime.now() - timedelta(seconds=seconds)
+        sums: Dict[str, float] = defaultdict(float)
+        counts: Dict[str, int] = defaultdict(int)
+        for d in self.buffer:
+            if d.timestamp <= cutoff or not d.derived:
+                continue
+            for name, value in d.derived.items():
+                if name not in names or not isinstance(value, (int, float)):
+                    continue  # z.B. SHIFT_HINT ("upshift"/None) lässt sich nicht mitteln
+                sums[name] += float(value)
+                counts[name] += 1
+        
+        result = {name: sums[name] / counts[name] for name in sums}
+        return result if result else None
+    
     def reset_1sec_timer(self) -> None:
         """Setzt den 1-Sekunden Timer zurück"""
         self.last_1sec_save = datetime.now()
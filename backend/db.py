@@ -1,7 +1,8 @@
 import os
 import sqlite3
 import logging
-from typing import List, Tuple, Any
+import threading
+from typing import Dict, List, Tuple, Any
 from contextlib import contextmanager
 from pathlib import Path
 
@@ -17,8 +18,9 @@ def _resolve_db_path(url_or_path: str) -> str:
     return url_or_path
 
 class DatabaseConnection:
-    def __init__(self, db_path: str = "database.db"):
+    def __init__(self, db_path: str = "database.db", auto_id: int = 1):
         self.db_path = _resolve_db_path(db_path)
+        self.auto_id = auto_id
         self.init_db()
     
     @contextmanager
@@ -67,11 +69,13 @@ class DatabaseConnection:
                 VALUES (1, 'Default Owner', 'owner@example.com')
                 """
             )
+            default_vin = 'DEFAULTVIN0000000' if self.auto_id == 1 else f'DEFAULTVIN{self.auto_id:07d}'
             cursor.execute(
                 """
                 INSERT OR IGNORE INTO auto (id, owner, make, model, km_stand, year, vin)
-                VALUES (1, 1, 'Unknown', 'Unknown', 0, 2000, 'DEFAULTVIN0000000')
-                """
+                VALUES (?, 1, 'Unknown', 'Unknown', 0, 2000, ?)
+                """,
+                (self.auto_id, default_vin),
             )
     
     def execute_query(self, query: str, params: Tuple = ()) -> List[dict]:
@@ -129,6 +133,17 @@ class DatabaseConnection:
                 (auto_id, coolant_temp, oil_temp, fuel_level, voltage, boost, oil_pressure),
             )
 
+    def insert_log_derived(self, auto_id: int, values: Dict[str, float]) -> None:
+        """Insert one row per derived signal (1-second averages)."""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany(
+                """
+                INSERT INTO logs_derived (auto_id, name, value) VALUES (?, ?, ?)
+                """,
+                [(auto_id, name, value) for name, value in values.items()],
+            )
+
     def get_latest_logs_1sec(self, auto_id: int, limit: int = 60) -> List[dict]:
         """Get the latest 1-second logs."""
         return self.execute_query(
@@ -153,6 +168,31 @@ class DatabaseConnection:
             (auto_id, limit),
         )
 
+class ShardedDatabase:
+    """Eine SQLite-Datei pro Auto, damit parallele Schreiber nicht um eine Sperre konkurrieren.
+
+    Aus "sqlite:////data/app.db" wird z.B. "/data/app_auto1.db", "/data/app_auto2.db", ...
+    """
+
+    def __init__(self, base_path: str = "database.db"):
+        root, ext = os.path.splitext(_resolve_db_path(base_path))
+        self.root = root
+        self.ext = ext or ".db"
+        self.shards: Dict[int, DatabaseConnection] = {}
+        self._lock = threading.Lock()
+
+    def shard_path(self, auto_id: int) -> str:
+        return f"{self.root}_auto{auto_id}{self.ext}"
+
+    def get(self, auto_id: int) -> DatabaseConnection:
+        """Gibt die Datenbank eines Autos zurück und legt sie bei Bedarf an"""
+        with self._lock:
+            shard = self.shards.get(auto_id)
+            if shard is None:
+                shard = DatabaseConnection(self.shard_path(auto_id), auto_id=auto_id)
+                self.shards[auto_id] = shard
+            return shard
+
 # Usage example
 if __name__ == "__main__":
     db = DatabaseConnection(os.getenv("DATABASE_URL", "database.db"))
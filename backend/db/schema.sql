@@ -41,10 +41,21 @@ create table if not exists logs_10sec (
     timestamp timestamp default current_timestamp
 );
 
+-- 1-Sekunden-Durchschnitte ausgewählter abgeleiteter Signale (LOGGED_SIGNALS in signal_pipeline.py),
+-- eine Zeile pro Signal
+create table if not exists logs_derived (
+    id serial primary key,
+    auto_id int references auto(id) on delete cascade,
+    name varchar(50) not null,
+    value real not null,
+    timestamp timestamp default current_timestamp
+);
+
 -- Erstelle Indexes nur wenn sie nicht existieren
 create index if not exists idx_auto_owner on auto(owner);
 create index if not exists idx_logs_1sec_auto_id on logs_1sec(auto_id);
 create index if not exists idx_logs_10sec_auto_id on logs_10sec(auto_id);
+create index if not exists idx_logs_derived_auto_id on logs_derived(auto_id);
 
 create index idx_auto_owner on auto(owner);
 create index idx_logs_1sec_auto_id on logs_1sec(auto_id);
@@ -0,0 +1,252 @@
+"""Profiling und Event-Loop-Lag für die /admin-Endpoints in main.py.
+
+Wird nur mit DIAGNOSTICS=1 importiert. Profil und tracemalloc kosten nur während
+sie laufen; tracemalloc wird nach MEMORY_TRACE_LIMIT Sekunden automatisch beendet.
+"""
+import asyncio
+import cProfile
+import heapq
+import io
+import logging
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from fastapi import HTTPException
+from fastapi.responses import PlainTextResponse
+
+logger = logging.getLogger(__name__)
+
+
+class LoopLagMonitor:
+    """Misst laufend die Verzögerung des Event-Loops.
+
+    Ein Task schläft `interval` Sekunden und misst, wie viel später er wieder
+    drankommt. Ein Watchdog-Thread erkennt Hänger schon während sie passieren
+    und speichert den Stack des Loop-Threads, damit die Ursache sichtbar wird.
+    """
+
+    BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 250, 500, 1000)
+
+    def __init__(self, interval: float = 0.02, stall_threshold: float = 0.1, keep: int = 10):
+        self.interval = interval
+        self.stall_threshold = stall_threshold
+        self.keep = keep
+        self.task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+        self._loop_thread_id: Optional[int] = None
+        self._heartbeat = 0.0
+        self._pending_stacks: Dict[float, List[str]] = {}
+        self.reset()
+
+    def reset(self) -> None:
+        self.counts = [0] * (len(self.BUCKETS_MS) + 1)
+        self.samples = 0
+        self.total_lag = 0.0
+        self.max_lag = 0.0
+        self.stalls: List[tuple] = []  # Min-Heap der langsamsten Hänger
+        self.since = datetime.now()
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.perf_counter()
+        self.task = asyncio.create_task(self._run())
+        threading.Thread(target=self._watchdog, name="loop-lag-watchdog", daemon=True).start()
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self.task:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+    async def _run(self) -> None:
+        while True:
+            beat = time.perf_counter()
+            self._heartbeat = beat
+            await asyncio.sleep(self.interval)
+            lag = max(time.perf_counter() - beat - self.interval, 0.0)
+            self._record(beat, lag)
+
+    def _record(self, beat: float, lag: float) -> None:
+        lag_ms = lag * 1000
+        for i, limit in enumerate(self.BUCKETS_MS):
+            if lag_ms <= limit:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.samples += 1
+        self.total_lag += lag
+        self.max_lag = max(self.max_lag, lag)
+
+        stack = self._pending_stacks.pop(beat, None)
+        if lag >= self.stall_threshold:
+            stall = (lag, beat, datetime.now().isoformat(timespec="seconds"), stack)
+            if len(self.stalls) < self.keep:
+                heapq.heappush(self.stalls, stall)
+            else:
+                heapq.heappushpop(self.stalls, stall)
+        # Stacks von Beats, die nie aufgezeichnet wurden, nicht ansammeln
+        if len(self._pending_stacks) > self.keep:
+            self._pending_stacks.clear()
+
+    def _watchdog(self) -> None:
+        captured_beat = None
+        while not self._stop.wait(self.stall_threshold / 2):
+            beat = self._heartbeat
+            if beat == captured_beat:
+                continue
+            if time.perf_counter() - beat > self.interval + self.stall_threshold:
+                frame = sys._current_frames().get(self._loop_thread_id)
+                if frame is not None:
+                    self._pending_stacks[beat] = _format_stack(frame)
+                    captured_beat = beat
+
+    def report(self) -> dict:
+        labels = [f"<={limit}ms" for limit in self.BUCKETS_MS] + [f">{self.BUCKETS_MS[-1]}ms"]
+        return {
+            "running": self.task is not None,
+            "since": self.since.isoformat(timespec="seconds"),
+            "interval_ms": self.interval * 1000,
+            "samples": self.samples,
+            "mean_ms": round(self.total_lag / self.samples * 1000, 3) if self.samples else 0.0,
+            "max_ms": round(self.max_lag * 1000, 3),
+            "histogram": dict(zip(labels, self.counts)),
+            "slowest_stalls": [
+                {"lag_ms": round(lag * 1000, 1), "at": at, "stack": stack}
+                for lag, _, at, stack in sorted(self.stalls, reverse=True)
+            ],
+        }
+
+
+def _format_stack(frame) -> List[str]:
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append(f"{code.co_filename}:{frame.f_lineno} {code.co_name}")
+        frame = frame.f_back
+    return stack[::-1]
+
+
+def _collapse(frame) -> str:
+    """Stack im "collapsed"-Format (Wurzel;...;Blatt) für Flamegraphs."""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+def _sample_stacks(thread_id: int, seconds: float, interval: float) -> Counter:
+    """Stack-Sampler: liest periodisch den Stack des Loop-Threads (läuft im eigenen Thread)."""
+    stacks = Counter()
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        frame = sys._current_frames().get(thread_id)
+        if frame is not None:
+            stacks[_collapse(frame)] += 1
+        time.sleep(interval)
+    return stacks
+
+
+# Maximale Laufzeit des tracemalloc-Tracings, falls /admin/memory/stop vergessen wird
+MEMORY_TRACE_LIMIT = 300.0
+
+lag_monitor = LoopLagMonitor()
+_profile_lock = asyncio.Lock()
+_last_snapshot: Optional[tracemalloc.Snapshot] = None
+_trace_timer: Optional[asyncio.TimerHandle] = None
+
+
+async def profile(seconds: float, mode: str, limit: int):
+    """CPU-Profil des Event-Loop-Threads über `seconds` Sekunden.
+
+    mode=sample: Stack-Sampler (geringer Overhead, collapsed Stacks)
+    mode=cprofile: deterministisches Profil mit pstats-Ausgabe
+    """
+    if _profile_lock.locked():
+        raise HTTPException(status_code=409, detail="Es läuft bereits ein Profil")
+    async with _profile_lock:
+        if mode == "cprofile":
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                await asyncio.sleep(seconds)
+            finally:
+                profiler.disable()
+            output = io.StringIO()
+            pstats.Stats(profiler, stream=output).sort_stats("cumulative").print_stats(limit)
+            return PlainTextResponse(output.getvalue())
+
+        stacks = await asyncio.to_thread(_sample_stacks, threading.get_ident(), seconds, 0.005)
+        total = sum(stacks.values())
+        return {
+            "seconds": seconds,
+            "samples": total,
+            "stacks": [
+                {"count": count, "percent": round(count * 100 / total, 1), "stack": stack}
+                for stack, count in stacks.most_common(limit)
+            ],
+        }
+
+
+def _snapshot_diff(previous: tracemalloc.Snapshot):
+    snapshot = tracemalloc.take_snapshot()
+    return snapshot, snapshot.compare_to(previous, "traceback")
+
+
+async def memory_snapshot(limit: int, frames: int):
+    """tracemalloc-Snapshot: der erste Aufruf startet das Tracing,
+    jeder weitere liefert die Differenz zum vorherigen Snapshot.
+
+    Snapshot und Vergleich laufen im Thread - sie dauern bei großem Heap
+    deutlich länger als ein Broadcast-Intervall.
+    """
+    global _last_snapshot, _trace_timer
+    if not tracemalloc.is_tracing() or _last_snapshot is None:
+        tracemalloc.start(frames)
+        _trace_timer = asyncio.get_running_loop().call_later(MEMORY_TRACE_LIMIT, _stop_tracing)
+        _last_snapshot = await asyncio.to_thread(tracemalloc.take_snapshot)
+        return {"status": "tracing gestartet", "frames": frames, "stops_after_s": MEMORY_TRACE_LIMIT}
+
+    snapshot, stats = await asyncio.to_thread(_snapshot_diff, _last_snapshot)
+    _last_snapshot = snapshot
+    current, peak = tracemalloc.get_traced_memory()
+    return {
+        "traced_current_kb": round(current / 1024, 1),
+        "traced_peak_kb": round(peak / 1024, 1),
+        "top_growth": [
+            {
+                "size_diff_kb": round(stat.size_diff / 1024, 1),
+                "count_diff": stat.count_diff,
+                "size_kb": round(stat.size / 1024, 1),
+                "traceback": stat.traceback.format(),
+            }
+            for stat in stats[:limit]
+        ],
+    }
+
+
+def _stop_tracing() -> None:
+    global _last_snapshot, _trace_timer
+    if _trace_timer is not None:
+        _trace_timer.cancel()
+        _trace_timer = None
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+        logger.info("tracemalloc beendet")
+    _last_snapshot = None
+
+
+async def memory_stop():
+    """Beendet das tracemalloc-Tracing (kostet sonst Speicher und CPU)"""
+    _stop_tracing()
+    return {"status": "ok"}
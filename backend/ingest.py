@@ -0,0 +1,425 @@
+import asyncio
+import glob
+import logging
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import serial
+
+from data_aggregator import DataAggregator, RawDataPoint
+from signal_pipeline import DEFAULT_DT, LOGGED_SIGNALS, build_default_pipeline
+
+try:
+    from zoneinfo import ZoneInfo
+except ImportError:
+    ZoneInfo = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_OBD_DATA = {
+    "RPM": "0",
+    "SPEED": "0",
+    "COOLANT": "20",
+    "OIL": "60",
+    "FUEL": "73",
+    "VOLTAGE": "12.1",
+    "BOOST": "1.1",
+    "OILPRESS": "0.3"
+}
+
+
+def get_display_time() -> datetime:
+    """Gibt die aktuelle lokale Zeit für die Anzeige zurück."""
+    if ZoneInfo is not None:
+        return datetime.now(ZoneInfo("Europe/Vienna"))
+    return datetime.now().astimezone()
+
+
+# Konvertiere OBD_KEY zu float, fallback auf 0.0
+def safe_float(value: str, default: float = 0.0) -> float:
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return default
+
+
+def parse_port_config(text: str) -> Dict[int, List[str]]:
+    """Parst "auto_id=port[|port...],..." z.B. "1=/dev/ttyUSB0,2=/dev/ttyUSB1".
+
+    Mehrere Ports pro Auto werden der Reihe nach probiert (erster der öffnet gewinnt).
+    """
+    ports: Dict[int, List[str]] = {}
+    for entry in text.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        auto_id, sep, port_list = entry.partition("=")
+        if not sep or not port_list.strip():
+            raise ValueError(f"Ungültiger Port-Eintrag '{entry}' (erwartet auto_id=port)")
+        ports[int(auto_id)] = [p.strip() for p in port_list.split("|") if p.strip()]
+    return ports
+
+
+class VehicleReader:
+    """Liest die UART-Daten eines Autos und sendet sie an dessen WebSocket-Abonnenten"""
+
+    def __init__(
+        self,
+        auto_id: int,
+        ports: List[str],
+        baudrate: int,
+        broadcast_interval: float,
+        on_delivered: Optional[Callable[[], None]] = None,
+    ):
+        self.auto_id = auto_id
+        self.ports = ports
+        self.baudrate = baudrate
+        self.broadcast_interval = broadcast_interval
+        self.on_delivered = on_delivered  # Aufruf nach jedem Frame, der einen Abonnenten erreicht hat
+        self.ser: Optional[serial.Serial] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._reader_fd: Optional[int] = None  # Beim Event-Loop registrierter UART (add_reader)
+        self.port: Optional[str] = None
+        self.subscribers = set()
+        self.obd_data = dict(DEFAULT_OBD_DATA)
+        self.pipeline = build_default_pipeline()
+        self.derived = {}
+        self.aggregator: Optional[DataAggregator] = None  # Gesetzt wenn DB-Logging aktiv
+        self.storage_error: Optional[str] = None  # Letzter Fehler beim Schreiben in die Datenbank
+        self.buffer = ""
+        self.last_sample_time: Optional[float] = None  # Loop-Zeit des letzten Reads mit Samples
+        self.uart_data_active = False
+        self.no_data = False
+        self.data_received_count = 0
+        self.log = logging.getLogger(f"{__name__}.auto{auto_id}")
+
+    @property
+    def uart_connected(self) -> bool:
+        return bool(self.ser and self.ser.is_open) and not self.no_data
+
+    # UART initialisieren (blockierend - nur über asyncio.to_thread aufrufen)
+    def open(self) -> bool:
+        self.log.info("=" * 60)
+        self.log.info(f"UART-Initialisierung gestartet (Auto {self.auto_id})")
+        self.log.info(f"Konfigurierte Ports: {self.ports}")
+
+        for port in self.ports:
+            try:
+                ser = serial.Serial(port, self.baudrate, timeout=0.05, rtscts=False, dsrdtr=False)
+                self.log.info(f"✓ UART verbunden: {port} @ {self.baudrate} baud")
+                self.log.info(f"  Port-Info: {ser}")
+
+                # Test: Lese kurz ab, um zu sehen ob Daten kommen
+                time.sleep(0.1)
+                if ser.in_waiting > 0:
+                    test_data = ser.read(min(100, ser.in_waiting))
+                    self.log.info(f"  ✓ Testlesen erfolgreich: {len(test_data)} Bytes empfangen: {repr(test_data[:50])}")
+                    self.buffer += test_data.decode(errors='ignore')
+                else:
+                    self.log.warning(f"  ⚠ Noch keine Daten auf {port} (normal beim Start)")
+
+                self.log.info("=" * 60)
+                self.port = port
+                self.ser = ser
+                return True
+            except Exception as e:
+                self.log.warning(f"✗ Port {port} nicht verfügbar: {e}")
+                continue
+
+        self.log.error("Keine UART-Schnittstelle verfügbar. Verfügbare Ports auf diesem System:")
+        possible_ports = glob.glob("/dev/tty*") + glob.glob("/dev/serial*")
+        for p in possible_ports[:10]:
+            self.log.error(f"  - {p}")
+
+        self.log.info("=" * 60)
+        return False
+
+    def close(self) -> None:
+        """Schließt die UART-Verbindung dieses Autos."""
+        if self._reader_fd is not None:
+            self._loop.remove_reader(self._reader_fd)
+            self._reader_fd = None
+        if self.ser:
+            try:
+                self.ser.close()
+            except Exception:
+                pass
+        self.ser = None
+        self.port = None
+        self.uart_data_active = False
+        self.last_sample_time = None
+
+    def feed(self, text: str, current_time: float) -> None:
+        """Parst Daten im Format "rpm:speed:temp/" oder "NO_DATA/" aus dem Puffer.
+
+        Kommen mehrere Frames in einem Read an (z.B. nach einem Hänger), werden sie
+        gleichmäßig über die Zeit seit dem letzten Sample verteilt, damit Glättung
+        und Ableitung mit dem echten Abstand rechnen.
+        """
+        self.buffer += text
+        samples = []  # (rpm, speed, temp) oder None für NO_DATA, in Empfangsreihenfolge
+        while '/' in self.buffer:
+            line, self.buffer = self.buffer.split('/', 1)
+            line = line.strip()
+            self.log.debug(f"[UART PARSE] '/{line}/' -> Wert: '{line}'")
+
+            if not line:  # Leere Zeile überspringen
+                continue
+
+            # Prüfe auf NO_DATA
+            if line == "NO_DATA":
+                samples.append(None)
+                continue
+
+            # Parse Format: "rpm:speed:temp"
+            if line.count(':') != 2:
+                self.log.warning(f"[UART ERROR] Zeile passt nicht zum erwarteten Format (braucht 2x ':'): '{line}'")
+                continue
+            try:
+                rpm_str, speed_str, temp_str = (part.strip() for part in line.split(':'))
+                rpm = safe_float(rpm_str)
+                speed = safe_float(speed_str)
+                temp = safe_float(temp_str)
+            except (ValueError, IndexError) as e:
+                self.log.warning(f"[UART ERROR] Fehler beim Parsen der OBD-Daten '{line}': {e}")
+                continue
+            samples.append((rpm, speed, temp))
+
+        count = sum(1 for sample in samples if sample is not None)
+        if count:
+            start = self.last_sample_time
+            if start is None or start >= current_time:
+                start = current_time - DEFAULT_DT * count
+            step = (current_time - start) / count
+        index = 0
+        for sample in samples:
+            if sample is None:
+                self.log.info("NO_DATA vom ESP empfangen - keine gültigen OBD-Daten")
+                self.no_data = True
+                continue
+            index += 1
+            self._apply_sample(*sample, start + step * index)
+        if count:
+            self.last_sample_time = current_time
+
+    def _apply_sample(self, rpm: float, speed: float, temp: float, current_time: float) -> None:
+        obd_data = self.obd_data
+        obd_data["RPM"] = str(int(rpm)) if rpm >= 0 else "0"
+        obd_data["SPEED"] = str(int(speed)) if speed >= 0 else "0"
+        obd_data["COOLANT"] = f"{temp:.1f}" if temp >= -40 else "0"
+
+        self.pipeline.update({"RPM": rpm, "SPEED": speed, "COOLANT": temp}, current_time)
+        self.derived = self.pipeline.snapshot()
+
+        if self.no_data:
+            self.no_data = False
+            self.log.info("UART-Datenempfang gestartet - OBD verbunden")
+
+        self.data_received_count += 1
+        if self.data_received_count == 1:
+            self.log.info(f"✓ Erste Daten vom ESP empfangen: RPM={rpm:.0f}, SPEED={speed:.0f}, COOLANT={temp:.1f}°C")
+        elif self.data_received_count % 20 == 0:
+            self.log.debug(f"[UART OK] Daten empfangen #{self.data_received_count}: RPM={rpm:.0f}, SPEED={speed:.0f}, COOLANT={temp:.1f}°C")
+
+        if self.aggregator is not None:
+            self.aggregator.add_data(RawDataPoint(
+                timestamp=datetime.now(),
+                rpm=rpm,
+                speed=speed,
+                coolant_temp=temp,
+                oil_temp=safe_float(obd_data.get("OIL")),
+                fuel_level=safe_float(obd_data.get("FUEL")),
+                voltage=safe_float(obd_data.get("VOLTAGE")),
+                boost=safe_float(obd_data.get("BOOST")),
+                oil_pressure=safe_float(obd_data.get("OILPRESS")),
+                derived=self.derived,
+            ))
+
+    def frame(self) -> dict:
+        """Baut den Broadcast-Frame für die Abonnenten."""
+        return {
+            **self.obd_data,
+            "AUTO_ID": self.auto_id,
+            "DERIVED": self.derived,
+            "UART_CONNECTED": self.uart_connected,
+            "UART_DATA_ACTIVE": self.uart_data_active,
+            "TIME": get_display_time().strftime("%H:%M:%S"),
+        }
+
+    async def broadcast(self) -> None:
+        # Ohne Abonnenten keinen Frame bauen
+        if not self.subscribers:
+            self.uart_data_active = False
+            return
+        broadcast_data = self.frame()
+        self.uart_data_active = False
+        delivered = False
+        for ws in list(self.subscribers):
+            try:
+                await ws.send_json(broadcast_data)
+                delivered = True
+            except Exception:
+                self.subscribers.discard(ws)
+        if delivered and self.on_delivered is not None:
+            self.on_delivered()
+
+    def _on_readable(self) -> None:
+        """Vom Event-Loop aufgerufen, sobald der UART Daten hat (loop.add_reader)."""
+        try:
+            raw_data = self.ser.read(self.ser.in_waiting or 1)
+        except (OSError, serial.SerialException) as e:
+            self.log.warning(f"UART-Lesen fehlgeschlagen: {e}")
+            self.close()
+            return
+        if not raw_data:
+            return
+        self.uart_data_active = True
+        try:
+            self.feed(raw_data.decode(errors='ignore'), self._loop.time())
+        except Exception as e:
+            self.log.error(f"Fehler bei UART-Verarbeitung: {e}")
+
+    # Hintergrund-Task für die UART-Datenverarbeitung dieses Autos. Gelesen wird über
+    # loop.add_reader, der Task wacht nur zum Broadcast auf - ein Port ohne Daten kostet nichts.
+    async def run(self) -> None:
+        loop = self._loop = asyncio.get_running_loop()
+        last_health_check = 0  # Zeit des letzten Health Checks
+        last_reconnect_attempt = 0  # Zeit des letzten Wiederverbindungsversuchs
+        init_job = None  # Laufende UART-Initialisierung im Hintergrund-Thread
+
+        try:
+            while True:
+                try:
+                    current_time = loop.time()
+
+                    # UART-Suche läuft im Thread, damit Broadcasts sofort starten können
+                    if self.ser is None and (init_job is None or init_job.done()) and (current_time - last_reconnect_attempt) >= 5.0:
+                        last_reconnect_attempt = current_time
+                        self.log.warning("UART nicht verfügbar - starte Initialisierung im Hintergrund")
+                        init_job = asyncio.create_task(asyncio.to_thread(self.open))
+
+                    # Neu geöffneten UART beim Event-Loop anmelden
+                    if self.ser is not None and self._reader_fd is None:
+                        self._reader_fd = self.ser.fileno()
+                        loop.add_reader(self._reader_fd, self._on_readable)
+                        # Daten aus dem Testlesen in open() sofort verarbeiten
+                        if '/' in self.buffer:
+                            self.feed("", current_time)
+
+                    # Zeige periodisch Debug-Info (alle ~1 Sekunde)
+                    if current_time - last_health_check >= 1.0:
+                        last_health_check = current_time
+                        self.log.info(f"[UART HEALTH] port={self.port}, buffer_len={len(self.buffer)}, connected={self.uart_connected}, samples={self.data_received_count}")
+
+                    await self.broadcast()
+                    await asyncio.sleep(self.broadcast_interval)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    self.log.error(f"Fehler bei UART-Verarbeitung: {e}")
+                    if isinstance(e, (OSError, serial.SerialException)):
+                        self.close()
+                    await asyncio.sleep(0.1)
+        finally:
+            if self._reader_fd is not None:
+                loop.remove_reader(self._reader_fd)
+                self._reader_fd = None
+
+    def status(self) -> dict:
+        return {
+            "port": self.port,
+            "uart_connected": self.uart_connected,
+            "samples": self.data_received_count,
+            "subscribers": len(self.subscribers),
+            "storage_error": self.storage_error,
+        }
+
+
+class IngestManager:
+    """Startet einen VehicleReader pro konfiguriertem Auto und schreibt optional
+    pro Auto in eine eigene Datenbank (siehe db.ShardedDatabase)."""
+
+    def __init__(
+        self,
+        ports: Dict[int, List[str]],
+        baudrate: int,
+        broadcast_interval: float,
+        storage=None,
+        on_delivered: Optional[Callable[[], None]] = None,
+    ):
+        self.readers: Dict[int, VehicleReader] = {
+            auto_id: VehicleReader(auto_id, port_list, baudrate, broadcast_interval, on_delivered)
+            for auto_id, port_list in ports.items()
+        }
+        self.storage = storage
+        self.tasks: List[asyncio.Task] = []
+
+    def get(self, auto_id: int) -> Optional[VehicleReader]:
+        return self.readers.get(auto_id)
+
+    def start(self) -> None:
+        for reader in self.readers.values():
+            self.tasks.append(asyncio.create_task(reader.run()))
+            if self.storage is not None:
+                reader.aggregator = DataAggregator()
+                self.tasks.append(asyncio.create_task(self._writer_task(reader)))
+        logger.info(f"Ingest gestartet für Autos: {sorted(self.readers)}")
+
+    async def stop(self) -> None:
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks.clear()
+        for reader in self.readers.values():
+            reader.close()
+
+    async def _writer_task(self, reader: VehicleReader) -> None:
+        """Speichert Aggregations-Daten in die Datenbank des jeweiligen Autos"""
+        db = None
+        aggregator = reader.aggregator
+        while True:
+            try:
+                # Datenbank erst hier anlegen, damit Fehler (z.B. Verzeichnis fehlt) geloggt und wiederholt werden
+                if db is None:
+                    db = await asyncio.to_thread(self.storage.get, reader.auto_id)
+
+                # 1-Sekunden Durchschnitte speichern
+                if aggregator.should_save_1sec():
+                    avg_data = aggregator.get_1sec_average()
+                    if avg_data and ('rpm' in avg_data or 'speed' in avg_data):
+                        await asyncio.to_thread(
+                            db.insert_log_1sec,
+                            auto_id=reader.auto_id,
+                            geschwindigkeit=avg_data.get('speed', 0.0),
+                            rpm=avg_data.get('rpm', 0.0),
+                        )
+                    derived_avg = aggregator.get_derived_average(1.0, LOGGED_SIGNALS)
+                    if derived_avg:
+                        await asyncio.to_thread(db.insert_log_derived, reader.auto_id, derived_avg)
+                    aggregator.reset_1sec_timer()
+
+                # 10-Sekunden Durchschnitte speichern
+                if aggregator.should_save_10sec():
+                    avg_data = aggregator.get_10sec_average()
+                    if avg_data:
+                        await asyncio.to_thread(
+                            db.insert_log_10sec,
+                            auto_id=reader.auto_id,
+                            coolant_temp=avg_data.get('coolant_temp', 0.0),
+                            oil_temp=avg_data.get('oil_temp', 0.0),
+                            fuel_level=avg_data.get('fuel_level', 0.0),
+                            voltage=avg_data.get('voltage', 0.0),
+                            boost=avg_data.get('boost', 0.0),
+                            oil_pressure=avg_data.get('oil_pressure', 0.0),
+                        )
+                    aggregator.reset_10sec_timer()
+
+                reader.storage_error = None
+                await asyncio.sleep(0.1)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                reader.log.error(f"Fehler bei Datenbank-Speicherung: {e}")
+                reader.storage_error = str(e)
+                await asyncio.sleep(1)
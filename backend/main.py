@@ -1,354 +1,149 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
-from fastapi.responses import FileResponse, Response
+import time
+
+# Startzeitpunkt für die Startup-Messung (vor allen schweren Imports)
+_MODULE_START = time.perf_counter()
+
+from fastapi import FastAPI, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-import csv
-import io
+from fastapi.responses import FileResponse, Response, StreamingResponse
 import serial
 import asyncio
 import logging
-import random
-import platform
 import os
-from datetime import datetime, timedelta
 from contextlib import asynccontextmanager
-# from db import DatabaseConnection
-# from data_aggregator import DataAggregator, RawDataPoint
-try:
-    from zoneinfo import ZoneInfo
-except ImportError:
-    ZoneInfo = None
+from typing import Optional
+from static_files import frontend_available, frontend_response
+from ingest import IngestManager, parse_port_config
+from db import ShardedDatabase
+from sync import iter_sync_frames, parse_high_water
 
 # UART Konfiguration für OBD-Daten
 # Raspberry Pi Standard UART Ports
 SERIAL_PORTS = ['/dev/ttyAMA0', '/dev/ttyS0', '/dev/serial0']
 BAUDRATE = 115200
-SERIAL_PORT = None
+
+# Diagnose-Endpoints unter /admin (Profil, Speicher, Loop-Lag) - ohne DIAGNOSTICS=1 liefern sie 404
+DIAGNOSTICS = os.getenv("DIAGNOSTICS") == "1"
+
+# Mehrere Autos/Ports: INGEST_PORTS="1=/dev/ttyUSB0,2=/dev/ttyUSB1"
+# Ohne Angabe wird ein Auto (AUTO_ID) auf den Standard-UART-Ports gesucht.
+INGEST_PORTS = os.getenv("INGEST_PORTS", "")
+
+# Startup-Messwerte in Sekunden seit Modulstart, werden unter /health gemeldet
+STARTUP_TIMINGS = {
+    "import_s": round(time.perf_counter() - _MODULE_START, 4),
+    "listening_s": None,
+    "first_frame_s": None,
+}
 
 # Logging konfigurieren
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
+# Konstanten
+AUTO_ID = 1  # Standardauto für dieses Projekt
+broadcast_interval = 0.05  # Broadcast alle 100ms für deutlich weniger Last
+
 # Globale Variablen
-ser = None
-connected_clients = set()
-# db_url = os.getenv("DATABASE_URL", "database.db")
-# db = DatabaseConnection(db_url)
-# aggregator = DataAggregator()
+# Datenbank-Logging (eine SQLite-Datei pro Auto) ist optional, Standard ist nur Live-Anzeige
+storage = ShardedDatabase(os.getenv("DATABASE_URL", "database.db")) if os.getenv("DB_LOGGING") == "1" else None
 
 
-def close_uart():
-    """Schließt die aktuelle UART-Verbindung und setzt die Globals zurück."""
-    global ser, SERIAL_PORT
-    if ser:
-        try:
-            ser.close()
-        except Exception:
-            pass
-    ser = None
-    SERIAL_PORT = None
+def _mark_startup(key: str) -> None:
+    """Speichert einen Startup-Messpunkt einmalig (Sekunden seit Modulstart)."""
+    if STARTUP_TIMINGS[key] is None:
+        STARTUP_TIMINGS[key] = round(time.perf_counter() - _MODULE_START, 4)
+        logger.info(f"[STARTUP] {key}={STARTUP_TIMINGS[key]}")
 
-# Konstanten
-AUTO_ID = 1  # Standardauto für dieses Projekt
-broadcast_interval = 0.05  # Broadcast alle 100ms für deutlich weniger Last
+
+def _find_uvicorn_server():
+    """Sucht die laufende uvicorn.Server-Instanz über den Task von Server.serve().
+
+    Funktioniert für `python main.py` und `uvicorn main:app`; ohne echten Socket
+    (z.B. TestClient) gibt es keinen Server und `listening_s` bleibt None.
+    """
+    import uvicorn
+    for task in asyncio.all_tasks():
+        frame = getattr(task.get_coro(), "cr_frame", None)
+        server = frame.f_locals.get("self") if frame is not None else None
+        if isinstance(server, uvicorn.Server):
+            return server
+    return None
 
 
-def get_display_time() -> datetime:
-    """Gibt die aktuelle lokale Zeit für die Anzeige zurück."""
-    if ZoneInfo is not None:
-        return datetime.now(ZoneInfo("Europe/Vienna"))
-    return datetime.now().astimezone()
+async def _track_listening():
+    """Wartet bis uvicorn den Socket geöffnet hat und merkt sich den Zeitpunkt."""
+    server = _find_uvicorn_server()
+    if server is None:
+        return
+    while not server.started:
+        await asyncio.sleep(0.005)
+    _mark_startup("listening_s")
+
+
+ingest = IngestManager(
+    parse_port_config(INGEST_PORTS) or {AUTO_ID: SERIAL_PORTS},
+    BAUDRATE,
+    broadcast_interval,
+    storage=storage,
+    on_delivered=lambda: _mark_startup("first_frame_s"),
+)
+# Auto für /ws und /health ohne ?auto= Angabe
+DEFAULT_AUTO_ID = AUTO_ID if AUTO_ID in ingest.readers else min(ingest.readers)
 
-# UART initialisieren
-def init_uart():
-    global ser, SERIAL_PORT
+
+def scan_ports():
+    """Sucht auf allen seriellen Ports nach Daten (blockierend, nur für Debugging)."""
     import glob
-    
-    # Finde alle verfügbaren seriellen Ports
-    logger.info("=" * 60)
-    logger.info("UART-Initialisierung gestartet")
-    logger.info(f"Konfigurierte Ports: {SERIAL_PORTS}")
-    
-    # Versuche konfigurierte Ports
-    for port in SERIAL_PORTS:
+    logger.info("[PORT SCAN] Scanne alle verfügbaren Ports auf Daten...")
+    all_ports = glob.glob("/dev/tty*") + glob.glob("/dev/serial*")
+    for test_port in all_ports[:20]:  # Limit auf erste 20
         try:
-            ser = serial.Serial(port, BAUDRATE, timeout=0.05, rtscts=False, dsrdtr=False)
-            SERIAL_PORT = port  # Setze zuerst, bevor logging
-            logger.info(f"✓ UART verbunden: {SERIAL_PORT} @ {BAUDRATE} baud")
-            logger.info(f"  Port-Info: {ser}")
-            
-            # Test: Lese kurz ab, um zu sehen ob Daten kommen
-            import time
-            time.sleep(0.1)
-            if ser.in_waiting > 0:
-                test_data = ser.read(min(100, ser.in_waiting))
-                logger.info(f"  ✓ Testlesen erfolgreich: {len(test_data)} Bytes empfangen: {repr(test_data[:50])}")
-            else:
-                logger.warning(f"  ⚠ Noch keine Daten auf {port} (normal beim Start)")
-            
-            logger.info("=" * 60)
-            return True
-        except Exception as e:
-            logger.warning(f"✗ Port {port} nicht verfügbar: {e}")
-            continue
-    
-    logger.error("Keine UART-Schnittstelle verfügbar. Verfügbare Ports auf diesem System:")
-    # Versuche alle möglichen Ports zu finden
-    possible_ports = glob.glob("/dev/tty*") + glob.glob("/dev/serial*")
-    for p in possible_ports[:10]:
-        logger.error(f"  - {p}")
-    
-    logger.info("=" * 60)
-    ser = None
-    return False
-
-obd_data = {
-    "RPM": "0",
-    "SPEED": "0",
-    "COOLANT": "20",
-    "OIL": "60",
-    "FUEL": "73",
-    "VOLTAGE": "12.1",
-    "BOOST": "1.1",
-    "OILPRESS": "0.3"
-}
-last_broadcast_time = 0
+            test_ser = serial.Serial(test_port, BAUDRATE, timeout=0.01, rtscts=False, dsrdtr=False)
+            test_waiting = test_ser.in_waiting
+            if test_waiting > 0:
+                test_data = test_ser.read(min(100, test_waiting))
+                logger.warning(f"  ✓✓✓ DATEN GEFUNDEN auf {test_port}: {test_waiting} bytes: {repr(test_data)}")
+            test_ser.close()
+        except Exception:
+            pass  # Ignoriere Fehler beim Scan
 
-# Konvertiere OBD_KEY zu float, fallback auf 0.0
-def safe_float(value: str, default: float = 0.0) -> float:
-    try:
-        return float(value)
-    except (ValueError, TypeError):
-        return default
-
-# Hintergrund-Task für UART-Datenverarbeitung
-async def uart_task():
-    global obd_data, last_broadcast_time
-    buffer = ""
-    first_message = True
-    uart_connected = False
-    uart_data_active = False
-    data_received_count = 0
-    debug_count = 0  # Zähler für periodisches Debug-Output
-    last_health_check = 0  # Zeit des letzten Health Checks
-    last_port_scan = 0  # Zeit des letzten Port Scans
-    last_reconnect_attempt = 0  # Zeit des letzten Wiederverbindungsversuchs
-    
+
+async def port_scan_task():
+    """Scannt alle 3 Sekunden im Thread nach Daten, solange das Standardauto keinen UART hat.
+
+    Nur ohne INGEST_PORTS aktiv - bei fest konfigurierten Ports würde der Scan
+    den anderen Readern Daten wegnehmen.
+    """
+    reader = ingest.get(AUTO_ID)
     while True:
-        try:
-            current_time = asyncio.get_event_loop().time()
-            debug_count += 1
-
-            if ser is None and (current_time - last_reconnect_attempt) >= 5.0:
-                last_reconnect_attempt = current_time
-                logger.warning("UART nicht verfügbar - versuche Neuinitialisierung")
-                init_uart()
-                await asyncio.sleep(0.1)
-                continue
-
-            uart_connected = bool(ser and ser.is_open)
-            
-            # Zeige periodisch Debug-Info (alle ~1 Sekunde)
-            if current_time - last_health_check >= 1.0:
-                last_health_check = current_time
-                try:
-                    in_waiting = ser.in_waiting if ser else -1
-                except (OSError, serial.SerialException) as e:
-                    logger.warning(f"UART-Health-Check fehlgeschlagen: {e}")
-                    close_uart()
-                    uart_connected = False
-                    await asyncio.sleep(1)
-                    continue
-                logger.info(f"[UART HEALTH] ser={ser is not None}, in_waiting={in_waiting}, buffer_len={len(buffer)}, connected={uart_connected}")
-            
-            # Scanne alle Ports auf der Suche nach Daten (alle 3 Sekunden)
-            if current_time - last_port_scan >= 3.0:
-                last_port_scan = current_time
-                import glob
-                logger.info("[PORT SCAN] Scanne alle verfügbaren Ports auf Daten...")
-                all_ports = glob.glob("/dev/tty*") + glob.glob("/dev/serial*")
-                for test_port in all_ports[:20]:  # Limit auf erste 20
-                    try:
-                        test_ser = serial.Serial(test_port, BAUDRATE, timeout=0.01, rtscts=False, dsrdtr=False)
-                        test_waiting = test_ser.in_waiting
-                        if test_waiting > 0:
-                            test_data = test_ser.read(min(100, test_waiting))
-                            logger.warning(f"  ✓✓✓ DATEN GEFUNDEN auf {test_port}: {test_waiting} bytes: {repr(test_data)}")
-                        test_ser.close()
-                    except Exception as e:
-                        pass  # Ignoriere Fehler beim Scan
-            
-            if ser:
-                try:
-                    waiting = ser.in_waiting
-                except (OSError, serial.SerialException) as e:
-                    logger.warning(f"UART-Zugriff fehlgeschlagen: {e}")
-                    close_uart()
-                    uart_connected = False
-                    await asyncio.sleep(1)
-                    continue
-
-            if ser and waiting:
-                try:
-                    raw_data = ser.read(waiting)
-                except (OSError, serial.SerialException) as e:
-                    logger.warning(f"UART-Lesen fehlgeschlagen: {e}")
-                    close_uart()
-                    uart_connected = False
-                    uart_data_active = False
-                    await asyncio.sleep(1)
-                    continue
-                uart_data_active = True
-                buffer += raw_data.decode(errors='ignore')
-                
-                # Hex-String für Debugging
-                hex_str = ' '.join(f'{b:02x}' for b in raw_data)
-                logger.warning(f"[UART RAW] {len(raw_data)} bytes: HEX=[{hex_str}] TEXT={repr(raw_data.decode(errors='ignore'))} BUFFER_LEN={len(buffer)}")
-                
-                # Parse Daten im Format "rpm:speed:temp/" oder "NO_DATA"
-                while '/' in buffer:
-                    line, buffer = buffer.split('/', 1)
-                    line = line.strip()
-                    logger.info(f"[UART PARSE] '/{line}/' -> Wert: '{line}'")
-                    
-                    if not line:  # Leere Zeile überspringen
-                        logger.debug("[UART DEBUG] Leere Zeile überspringen")
-                        continue
-                    
-                    # Prüfe auf NO_DATA
-                    if line == "NO_DATA":
-                        logger.info("NO_DATA vom ESP empfangen - keine gültigen OBD-Daten")
-                        uart_connected = False
-                        continue
-                    
-                    # Parse Format: "rpm:speed:temp"
-                    if ':' in line and line.count(':') == 2:
-                        try:
-                            parts = line.split(':')
-                            rpm_str, speed_str, temp_str = parts[0].strip(), parts[1].strip(), parts[2].strip()
-                            logger.debug(f"[UART DEBUG] Teile: RPM='{rpm_str}', SPEED='{speed_str}', TEMP='{temp_str}'")
-                            
-                            # Konvertiere zu float
-                            rpm = safe_float(rpm_str)
-                            speed = safe_float(speed_str)
-                            temp = safe_float(temp_str)
-                            
-                            # Aktualisiere OBD-Daten
-                            obd_data["RPM"] = str(int(rpm)) if rpm >= 0 else "0"
-                            obd_data["SPEED"] = str(int(speed)) if speed >= 0 else "0"
-                            obd_data["COOLANT"] = f"{temp:.1f}" if temp >= -40 else "0"
-                            
-                            data_received_count += 1
-                            
-                            if not uart_connected:
-                                uart_connected = True
-                                logger.info("UART-Datenempfang gestartet - OBD verbunden")
-                            
-                            if first_message:
-                                logger.info(f"✓ Erste Daten vom ESP empfangen: RPM={rpm:.0f}, SPEED={speed:.0f}, COOLANT={temp:.1f}°C")
-                                first_message = False
-                            
-                            if data_received_count % 20 == 0:  # Alle 20 Datenpunkte loggen (ca. alle 10 Sekunden bei 500ms Intervall)
-                                logger.info(f"[UART OK] Daten empfangen #{data_received_count}: RPM={rpm:.0f}, SPEED={speed:.0f}, COOLANT={temp:.1f}°C")
-                            
-                            # Rohdaten werden nur fuer die Live-Anzeige verarbeitet.
-                            # Datenbank-Logging ist fuer den Darstellungsfokus auskommentiert.
-                            # raw_data = RawDataPoint(
-                            #     timestamp=datetime.now(),
-                            #     rpm=rpm,
-                            #     speed=speed,
-                            #     coolant_temp=temp,
-                            #     oil_temp=safe_float(obd_data.get("OIL")),
-                            #     fuel_level=safe_float(obd_data.get("FUEL")),
-                            #     voltage=safe_float(obd_data.get("VOLTAGE")),
-                            #     boost=safe_float(obd_data.get("BOOST")),
-                            #     oil_pressure=safe_float(obd_data.get("OILPRESS")),
-                            # )
-                            # aggregator.add_data(raw_data)
-                        except (ValueError, IndexError) as e:
-                            logger.warning(f"[UART ERROR] Fehler beim Parsen der OBD-Daten '{line}': {e}")
-                    else:
-                        logger.warning(f"[UART ERROR] Zeile passt nicht zum erwarteten Format (braucht 2x ':'): '{line}'")
-            
-            # Broadcast gesammelte Daten wenn genug Zeit vergangen ist
-            if (current_time - last_broadcast_time) >= broadcast_interval:
-                corrected_time = get_display_time()
-                broadcast_data = {
-                    **obd_data,
-                    "UART_CONNECTED": uart_connected,
-                    "UART_DATA_ACTIVE": uart_data_active,
-                    "TIME": corrected_time.strftime("%H:%M:%S"),
-                }
-                uart_data_active = False
-                for ws in list(connected_clients):
-                    try:
-                        await ws.send_json(broadcast_data)
-                    except Exception:
-                        connected_clients.discard(ws)
-                logger.debug(f"OBD-Daten gesendet: {broadcast_data}")
-                last_broadcast_time = current_time
-            
-            await asyncio.sleep(0.001)
-        except Exception as e:
-            logger.error(f"Fehler bei UART-Verarbeitung: {e}")
-            if isinstance(e, (OSError, serial.SerialException)):
-                close_uart()
-                uart_connected = False
-                uart_data_active = False
-            await asyncio.sleep(0.1)
-
-
-# Speichere aggregierte Daten in die Datenbank
-# async def database_writer_task():
-#     """Speichert Aggregations-Daten in die Datenbank"""
-#     while True:
-#         try:
-#             # 1-Sekunden Durchschnitte speichern
-#             if aggregator.should_save_1sec():
-#                 avg_data = aggregator.get_1sec_average()
-#                 if avg_data and ('rpm' in avg_data or 'speed' in avg_data):
-#                     db.insert_log_1sec(
-#                         auto_id=AUTO_ID,
-#                         geschwindigkeit=avg_data.get('speed', 0.0),
-#                         rpm=avg_data.get('rpm', 0.0),
-#                     )
-#                     logger.info(f"1sec-Daten gespeichert: {avg_data}")
-#                     aggregator.reset_1sec_timer()
-#             
-#             # 10-Sekunden Durchschnitte speichern
-#             if aggregator.should_save_10sec():
-#                 avg_data = aggregator.get_10sec_average()
-#                 if avg_data:
-#                     db.insert_log_10sec(
-#                         auto_id=AUTO_ID,
-#                         coolant_temp=avg_data.get('coolant_temp', 0.0),
-#                         oil_temp=avg_data.get('oil_temp', 0.0),
-#                         fuel_level=avg_data.get('fuel_level', 0.0),
-#                         voltage=avg_data.get('voltage', 0.0),
-#                         boost=avg_data.get('boost', 0.0),
-#                         oil_pressure=avg_data.get('oil_pressure', 0.0),
-#                     )
-#                     logger.info(f"10sec-Daten gespeichert: {avg_data}")
-#                     aggregator.reset_10sec_timer()
-#             
-#             await asyncio.sleep(0.1)
-#         except Exception as e:
-#             logger.error(f"Fehler bei Datenbank-Speicherung: {e}")
-#             await asyncio.sleep(1)
+        # Erster Scan erst nach 3 Sekunden, damit er den Kaltstart nicht stört
+        await asyncio.sleep(3.0)
+        if reader.ser is None:
+            await asyncio.to_thread(scan_ports)
 
 
 # Lifespan-Context für Startup/Shutdown
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup
-    init_uart()
-    uart_bg_task = asyncio.create_task(uart_task())
-    # db_bg_task = asyncio.create_task(database_writer_task())
-    logger.info("Backend gestartet - nur Live-Anzeige aktiviert")
+    # Startup - UARTs werden von den Readern im Hintergrund gesucht, damit der
+    # Server sofort WebSocket-Verbindungen annimmt
+    ingest.start()
+    listening_task = asyncio.create_task(_track_listening())
+    scan_bg_task = asyncio.create_task(port_scan_task()) if not INGEST_PORTS else None
+    if DIAGNOSTICS:
+        import diagnostics
+        diagnostics.lag_monitor.start()
+    logger.info("Backend gestartet - " + ("Datenbank-Logging aktiviert" if storage else "nur Live-Anzeige aktiviert"))
     yield
     # Shutdown
-    if ser:
-        ser.close()
-    uart_bg_task.cancel()
+    listening_task.cancel()
+    if scan_bg_task:
+        scan_bg_task.cancel()
+    if DIAGNOSTICS:
+        import diagnostics
+        await diagnostics.lag_monitor.stop()
+    await ingest.stop()
     logger.info("Backend beendet")
 
 # FastAPI App erstellen
@@ -364,16 +159,23 @@ app.add_middleware(
 )
 
 # Endpoints
-@app.get("/")
-async def root():
+@app.api_route("/", methods=["GET", "HEAD"])
+async def root(request: Request):
+    # Mit vorhandenem Frontend-Build wird direkt das Dashboard ausgeliefert
+    if frontend_available():
+        return frontend_response(request, "")
     return {"message": "RaspberryPi Dashboard API"}
 
 @app.get("/health")
 async def health_check():
+    default_reader = ingest.get(DEFAULT_AUTO_ID)
+    uart_connected = default_reader is not None and default_reader.ser is not None
     return {
         "status": "ok",
-        "uart_connected": ser is not None,
-        "obd_ready": ser is not None
+        "uart_connected": uart_connected,
+        "obd_ready": uart_connected,
+        "vehicles": {auto_id: reader.status() for auto_id, reader in ingest.readers.items()},
+        "startup": STARTUP_TIMINGS,
     }
 
 @app.get("/api/data")
@@ -383,31 +185,64 @@ async def get_data():
 # @app.get("/api/logs/1sec")
 # async def get_logs_1sec(limit: int = 60):
 #     """Holt die letzten 1-Sekunden Logs"""
-#     logs = db.get_latest_logs_1sec(AUTO_ID, limit)
+#     logs = storage.get(AUTO_ID).get_latest_logs_1sec(AUTO_ID, limit)
 #     return {"logs": logs}
 #
 # @app.get("/api/logs/10sec")
 # async def get_logs_10sec(limit: int = 60):
 #     """Holt die letzten 10-Sekunden Logs"""
-#     logs = db.get_latest_logs_10sec(AUTO_ID, limit)
+#     logs = storage.get(AUTO_ID).get_latest_logs_10sec(AUTO_ID, limit)
 #     return {"logs": logs}
 #
-# @app.get("/api/database/download")
-# async def download_database():
-#     """Lädt die Datenbank-Datei herunter"""
-#     db_path = db.db_path
-#     return FileResponse(
-#         path=db_path,
-#         filename="database.db",
-#         media_type="application/octet-stream"
-#     )
+
+async def _vehicle_db(auto: Optional[int]):
+    """Datenbank eines Autos, 404 wenn Datenbank-Logging aus ist oder das Auto unbekannt."""
+    if storage is None:
+        raise HTTPException(status_code=404, detail="Datenbank-Logging ist nicht aktiv (DB_LOGGING=1)")
+    auto_id = DEFAULT_AUTO_ID if auto is None else auto
+    if ingest.get(auto_id) is None:
+        raise HTTPException(status_code=404, detail=f"Unbekanntes Auto: {auto_id}")
+    # Beim ersten Zugriff wird die Datei samt Schema angelegt - nicht im Event-Loop
+    return auto_id, await asyncio.to_thread(storage.get, auto_id)
+
+
+@app.get("/api/database/download")
+async def download_database(auto: Optional[int] = None):
+    """Lädt die komplette Datenbank-Datei eines Autos herunter"""
+    auto_id, db = await _vehicle_db(auto)
+    return FileResponse(
+        path=db.db_path,
+        filename=f"database_auto{auto_id}.db",
+        media_type="application/octet-stream"
+    )
+
+
+@app.get("/api/sync")
+async def sync_database(request: Request, auto: Optional[int] = None, batch_size: int = 500):
+    """Streamt nur Zeilen nach dem High-Water-Mark des Clients (?logs_1sec=<rowid>&...).
+
+    Format siehe sync.py, Referenz-Client: sync_client.py
+    """
+    auto_id, db = await _vehicle_db(auto)
+    try:
+        high_water = parse_high_water(request.query_params)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="High-Water-Marks müssen ganze Zahlen sein")
+    return StreamingResponse(
+        iter_sync_frames(db, auto_id, high_water, batch_size),
+        media_type="application/octet-stream",
+        headers={"X-Sync-Format": "1"},
+    )
 
 
 # def _build_csv_text() -> str:
+#     import csv
+#     import io
+#
 #     tables = ["owners", "auto", "logs_1sec", "logs_10sec"]
 #     output = io.StringIO()
 #
-#     with db.get_connection() as conn:
+#     with storage.get(AUTO_ID).get_connection() as conn:
 #         cursor = conn.cursor()
 #         for table in tables:
 #             cursor.execute(
@@ -451,17 +286,78 @@ async def get_data():
 
 
 @app.websocket("/ws")
-async def websocket_endpoint(websocket: WebSocket):
+async def websocket_endpoint(websocket: WebSocket, auto: Optional[int] = None):
+    # Jeder Client bekommt nur den Datenstrom seines Autos (/ws?auto=2)
+    reader = ingest.get(DEFAULT_AUTO_ID if auto is None else auto)
+    if reader is None:
+        await websocket.close(code=1008)
+        return
     await websocket.accept()
-    connected_clients.add(websocket)
+    reader.subscribers.add(websocket)
     try:
         while True:
             # keep connection open; clients may send pings
             await websocket.receive_text()
     except WebSocketDisconnect:
-        connected_clients.discard(websocket)
+        reader.subscribers.discard(websocket)
     except Exception:
-        connected_clients.discard(websocket)
+        reader.subscribers.discard(websocket)
+
+# Diagnose-Endpoints: nur mit DIAGNOSTICS=1, sonst 404 - sie sind nicht abgesichert und
+# jeder im Hotspot könnte ein langes Profil oder tracemalloc starten
+def _require_diagnostics():
+    if not DIAGNOSTICS:
+        raise HTTPException(status_code=404, detail="Diagnose ist nicht aktiv (DIAGNOSTICS=1)")
+    import diagnostics
+    return diagnostics
+
+
+@app.get("/admin/profile")
+async def admin_profile(
+    seconds: float = Query(5.0, gt=0, le=60),
+    mode: str = Query("sample", pattern="^(sample|cprofile)$"),
+    limit: int = Query(30, ge=1, le=200),
+):
+    """CPU-Profil des Event-Loop-Threads (mode=sample: Stack-Sampler, mode=cprofile: pstats)"""
+    return await _require_diagnostics().profile(seconds, mode, limit)
+
+
+@app.get("/admin/lag")
+async def admin_loop_lag():
+    """Histogramm der Event-Loop-Verzögerung und Stacks der langsamsten Hänger"""
+    return _require_diagnostics().lag_monitor.report()
+
+
+@app.post("/admin/lag/reset")
+async def admin_reset_loop_lag():
+    _require_diagnostics().lag_monitor.reset()
+    return {"status": "ok"}
+
+
+@app.post("/admin/memory/snapshot")
+async def admin_memory_snapshot(limit: int = Query(20, ge=1, le=200), frames: int = Query(5, ge=1, le=50)):
+    """Startet tracemalloc bzw. liefert die Differenz zum vorherigen Snapshot"""
+    return await _require_diagnostics().memory_snapshot(limit, frames)
+
+
+@app.post("/admin/memory/stop")
+async def admin_memory_stop():
+    return await _require_diagnostics().memory_stop()
+
+
+# Frontend-Build ausliefern - muss als letzte Route registriert werden,
+# damit API-Endpoints Vorrang haben
+BACKEND_PREFIXES = ("api", "admin", "ws", "health")
+
+
+# HEAD ebenfalls, FileResponse sendet dann nur die Header
+@app.api_route("/{path:path}", methods=["GET", "HEAD"], include_in_schema=False)
+async def frontend(request: Request, path: str):
+    # Unbekannte Backend-Pfade sind echte 404 und kein Dashboard-HTML
+    if not frontend_available() or path.split("/", 1)[0] in BACKEND_PREFIXES:
+        return Response(status_code=404)
+    return frontend_response(request, path)
+
 
 if __name__ == "__main__":
     import uvicorn
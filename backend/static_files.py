@@ -0,0 +1,105 @@
+import os
+import hashlib
+import logging
+import mimetypes
+from pathlib import Path
+from typing import Dict, Optional, Set, Tuple
+
+from fastapi import Request
+from fastapi.responses import FileResponse, Response
+
+logger = logging.getLogger(__name__)
+
+# Produktions-Build des Frontends (react-router build, SPA-Modus)
+FRONTEND_DIST = Path(
+    os.getenv("FRONTEND_DIST", Path(__file__).parent.parent / "frontend" / "build" / "client")
+)
+
+# Vorkomprimierte Varianten in Präferenz-Reihenfolge (werden beim Build erzeugt)
+_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+# Dateien unter assets/ haben einen Hash im Namen und ändern sich nie
+_IMMUTABLE_DIR = "assets"
+_IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+
+_etag_cache: Dict[Tuple[Path, int, int], str] = {}
+
+
+def frontend_available() -> bool:
+    """Prüft ob ein Frontend-Build vorhanden ist."""
+    return (FRONTEND_DIST / "index.html").is_file()
+
+
+def _resolve(path: str) -> Optional[Path]:
+    """Löst einen URL-Pfad sicher innerhalb von FRONTEND_DIST auf."""
+    root = FRONTEND_DIST.resolve()
+    candidate = (root / path.lstrip("/")).resolve()
+    if root != candidate and root not in candidate.parents:
+        return None
+    return candidate if candidate.is_file() else None
+
+
+def _accepted_encodings(header: str) -> Set[str]:
+    """Liest die vom Client akzeptierten Encodings aus Accept-Encoding."""
+    accepted = set()
+    for part in header.split(","):
+        token, _, params = part.strip().partition(";")
+        params = params.strip().replace(" ", "")
+        if params.startswith("q="):
+            try:
+                if float(params[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if token:
+            accepted.add(token.strip().lower())
+    return accepted
+
+
+def _etag(file: Path, encoding: Optional[str]) -> str:
+    """Inhaltsbasierter ETag, gecacht solange sich die Datei nicht ändert."""
+    stat = file.stat()
+    key = (file, stat.st_mtime_ns, stat.st_size)
+    digest = _etag_cache.get(key)
+    if digest is None:
+        digest = hashlib.sha1(file.read_bytes()).hexdigest()[:20]
+        _etag_cache[key] = digest
+    return f'"{digest}-{encoding}"' if encoding else f'"{digest}"'
+
+
+def frontend_response(request: Request, path: str) -> Response:
+    """Liefert eine Datei aus dem Frontend-Build mit passendem Encoding und Cache-Headern.
+
+    Unbekannte Pfade ohne Dateiendung fallen auf index.html zurück (Client-Routing).
+    """
+    file = _resolve(path) if path else None
+    if file is None:
+        if "." in path.rsplit("/", 1)[-1]:
+            return Response(status_code=404)
+        file = FRONTEND_DIST / "index.html"
+
+    media_type = mimetypes.guess_type(file.name)[0] or "application/octet-stream"
+    headers = {"Vary": "Accept-Encoding"}
+
+    served, encoding = file, None
+    accepted = _accepted_encodings(request.headers.get("accept-encoding", ""))
+    for name, suffix in _ENCODINGS:
+        variant = file.with_name(file.name + suffix)
+        if name in accepted and variant.is_file():
+            served, encoding = variant, name
+            headers["Content-Encoding"] = name
+            break
+
+    relative = file.resolve().relative_to(FRONTEND_DIST.resolve())
+    if relative.parts[0] == _IMMUTABLE_DIR:
+        headers["Cache-Control"] = _IMMUTABLE_CACHE
+    else:
+        # index.html & Co. immer revalidieren, damit neue Builds sofort greifen
+        etag = _etag(served, encoding)
+        headers["Cache-Control"] = "no-cache"
+        headers["ETag"] = etag
+        if_none_match = request.headers.get("if-none-match", "")
+        if etag in (tag.strip() for tag in if_none_match.split(",")) or if_none_match.strip() == "*":
+            return Response(status_code=304, headers=headers)
+
+    return FileResponse(served, media_type=media_type, headers=headers)
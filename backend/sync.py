@@ -0,0 +1,105 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import zlib
+from typing import Dict, Iterator, Optional
+
+from db import DatabaseConnection
+
+logger = logging.getLogger(__name__)
+
+# Tabellen in Sync-Reihenfolge (Stammdaten zuerst)
+SYNC_TABLES = ("owners", "auto", "logs_1sec", "logs_10sec", "logs_derived")
+# Tabellen mit auto_id-Spalte
+AUTO_TABLES = ("auto", "logs_1sec", "logs_10sec", "logs_derived")
+
+MAX_BATCH_SIZE = 5000
+
+
+def encode_frame(header: dict, payload: bytes = b"") -> bytes:
+    """Ein Frame: JSON-Header in einer Zeile, danach `length` Bytes Payload."""
+    header = {**header, "length": len(payload)}
+    return json.dumps(header, separators=(",", ":")).encode() + b"\n" + payload
+
+
+def iter_sync_frames(
+    db: DatabaseConnection,
+    auto_id: int,
+    high_water: Dict[str, int],
+    batch_size: int = 500,
+) -> Iterator[bytes]:
+    """Liefert alle Zeilen nach dem High-Water-Mark (rowid) als komprimierte Batches.
+
+    Jeder Batch enthält `from`/`to` rowid und eine SHA-256 Prüfsumme über den
+    komprimierten Payload. Der Client übernimmt einen Batch nur komplett und
+    fragt nach einem Abbruch einfach mit seinem letzten `to` erneut an.
+    """
+    batch_size = max(1, min(batch_size, MAX_BATCH_SIZE))
+    # Eigene Verbindung: StreamingResponse holt die Batches aus wechselnden Threads
+    conn = sqlite3.connect(db.db_path, check_same_thread=False, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    try:
+        cursor = conn.cursor()
+        # Stand beim Start festhalten (kurze Transaktion). Danach liest jeder Batch
+        # in Autocommit für sich, damit kein Lese-Lock über den ganzen (evtl. langsamen)
+        # Download gehalten wird und der Logging-Writer weiterschreiben kann.
+        conn.execute("BEGIN")
+        bounds = {
+            table: cursor.execute(f"SELECT COALESCE(MAX(rowid), 0) FROM {table}").fetchone()[0]
+            for table in SYNC_TABLES
+        }
+        conn.execute("COMMIT")
+
+        for table in SYNC_TABLES:
+            last = int(high_water.get(table, 0))
+            where = "rowid > ? AND rowid <= ?"
+            params = [last, bounds[table]]
+            if table in AUTO_TABLES:
+                where += " AND " + ("id" if table == "auto" else "auto_id") + " = ?"
+                params.append(auto_id)
+            while True:
+                cursor.execute(
+                    f"SELECT rowid AS _rowid, * FROM {table} WHERE {where} ORDER BY rowid LIMIT ?",
+                    (*params, batch_size),
+                )
+                rows = cursor.fetchall()
+                if not rows:
+                    break
+                columns = list(rows[0].keys())[1:]
+                payload = zlib.compress(
+                    json.dumps(
+                        {"columns": columns, "rows": [list(row)[1:] for row in rows]},
+                        separators=(",", ":"),
+                        default=str,
+                    ).encode(),
+                    6,
+                )
+                to = rows[-1]["_rowid"]
+                yield encode_frame(
+                    {
+                        "table": table,
+                        "from": last,
+                        "to": to,
+                        "rows": len(rows),
+                        "sha256": hashlib.sha256(payload).hexdigest(),
+                    },
+                    payload,
+                )
+                last = to
+                params[0] = last
+                if len(rows) < batch_size:
+                    break
+    finally:
+        conn.close()
+    yield encode_frame({"done": True})
+
+
+def parse_high_water(query: Dict[str, str]) -> Dict[str, int]:
+    """Liest die High-Water-Marks (?logs_1sec=120&logs_10sec=12) aus den Query-Parametern."""
+    high_water = {}
+    for table in SYNC_TABLES:
+        value: Optional[str] = query.get(table)
+        if value is not None:
+            high_water[table] = int(value)
+    return high_water
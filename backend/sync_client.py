@@ -0,0 +1,144 @@
+"""Referenz-Client für /api/sync.
+
+Überträgt nur neue Zeilen in eine lokale SQLite-Datei. Der Stand (High-Water-Mark
+pro Auto und Tabelle) wird in `sync_state` gespeichert - zusammen mit den Zeilen
+eines Batches in einer Transaktion. Bricht die Verbindung ab, startet der
+nächste Aufruf einfach beim letzten vollständig übernommenen Batch.
+
+Aufruf:
+    python sync_client.py http://192.168.4.1:5000 logs.db [--auto 1]
+"""
+import argparse
+import hashlib
+import http.client
+import json
+import socket
+import sqlite3
+import urllib.parse
+import urllib.request
+import zlib
+from pathlib import Path
+from typing import Dict, Optional
+
+from sync import SYNC_TABLES
+
+SCHEMA_PATH = Path(__file__).parent / "db" / "schema.sql"
+
+
+class SyncError(Exception):
+    pass
+
+
+# Abbrüche während der Übertragung (WLAN weg, Timeout, abgeschnittener Frame).
+# Sie beenden den Sync ohne Fehler - der nächste Aufruf setzt beim letzten Batch fort.
+INTERRUPTED = (http.client.IncompleteRead, ConnectionError, socket.timeout, OSError, json.JSONDecodeError)
+
+
+def _init_local(conn: sqlite3.Connection) -> None:
+    for statement in SCHEMA_PATH.read_text().split(";"):
+        statement = statement.strip()
+        if statement:
+            try:
+                conn.execute(statement)
+            except sqlite3.Error:
+                pass  # Wie in db.py: doppelte Indexe ignorieren
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS sync_state (
+            auto_id INTEGER NOT NULL,
+            tbl TEXT NOT NULL,
+            high_water INTEGER NOT NULL,
+            PRIMARY KEY (auto_id, tbl)
+        )
+        """
+    )
+    conn.commit()
+
+
+def _high_water(conn: sqlite3.Connection, auto_id: int) -> Dict[str, int]:
+    rows = conn.execute("SELECT tbl, high_water FROM sync_state WHERE auto_id = ?", (auto_id,))
+    return dict(rows.fetchall())
+
+
+def _apply_batch(conn: sqlite3.Connection, auto_id: int, header: dict, payload: bytes) -> None:
+    data = json.loads(zlib.decompress(payload))
+    table = header["table"]
+    if table not in SYNC_TABLES:
+        raise SyncError(f"Unbekannte Tabelle im Batch: {table}")
+    columns = data["columns"]
+    placeholders = ", ".join("?" for _ in columns)
+    # Stammdaten überschreiben, Logs anhängen
+    verb = "INSERT OR REPLACE" if table in ("owners", "auto") else "INSERT"
+    with conn:
+        conn.executemany(
+            f"{verb} INTO {table} ({', '.join(columns)}) VALUES ({placeholders})",
+            data["rows"],
+        )
+        conn.execute(
+            "INSERT OR REPLACE INTO sync_state (auto_id, tbl, high_water) VALUES (?, ?, ?)",
+            (auto_id, table, header["to"]),
+        )
+
+
+def _read_frames(resp, conn: sqlite3.Connection, auto_id: int, stats: dict,
+                 max_batches: Optional[int]) -> None:
+    while True:
+        line = resp.readline()
+        if not line:
+            return  # Verbindung abgebrochen - nächster Aufruf setzt fort
+        header = json.loads(line)
+        payload = resp.read(header["length"])
+        stats["bytes"] += len(line) + len(payload)
+        if header.get("done"):
+            stats["done"] = True
+            return
+        if len(payload) != header["length"]:
+            return  # Unvollständiger Batch wird verworfen
+        if hashlib.sha256(payload).hexdigest() != header["sha256"]:
+            raise SyncError(f"Prüfsumme falsch für {header['table']} {header['from']}..{header['to']}")
+        _apply_batch(conn, auto_id, header, payload)
+        stats["batches"] += 1
+        stats["rows"] += header["rows"]
+        if max_batches is not None and stats["batches"] >= max_batches:
+            return
+
+
+def sync(base_url: str, local_path: str, auto_id: int = 1, batch_size: int = 500,
+         max_batches: Optional[int] = None, timeout: float = 30.0) -> dict:
+    """Synchronisiert neue Zeilen von `base_url` in `local_path`.
+
+    `max_batches` bricht nach N Batches ab (zum Testen der Wiederaufnahme).
+    Gibt Statistiken zurück: übertragene Bytes, Batches, Zeilen, fertig ja/nein
+    und bei einem Verbindungsabbruch dessen Ursache unter `error`.
+    """
+    conn = sqlite3.connect(local_path)
+    try:
+        _init_local(conn)
+        params = {"auto": auto_id, "batch_size": batch_size, **_high_water(conn, auto_id)}
+        url = f"{base_url.rstrip('/')}/api/sync?{urllib.parse.urlencode(params)}"
+        stats = {"bytes": 0, "batches": 0, "rows": 0, "done": False, "error": None}
+        with urllib.request.urlopen(url, timeout=timeout) as resp:
+            try:
+                _read_frames(resp, conn, auto_id, stats, max_batches)
+            except INTERRUPTED as e:
+                stats["error"] = f"{type(e).__name__}: {e}"
+        return stats
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("base_url")
+    parser.add_argument("local_path")
+    parser.add_argument("--auto", type=int, default=1)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+    stats = sync(args.base_url, args.local_path, args.auto, args.batch_size)
+    print(f"{stats['rows']} Zeilen in {stats['batches']} Batches, {stats['bytes']} Bytes, fertig={stats['done']}")
+    if stats["error"]:
+        print(f"Verbindung abgebrochen ({stats['error']}) - erneut aufrufen, um fortzusetzen")
+
+
+if __name__ == "__main__":
+    main()
@@ -475,7 +475,9 @@ export default function Dashboard({ theme }: DashboardProps) {
     // WebSocket connection to backend
     const proto = window.location.protocol === "https:" ? "wss" : "ws";
     const host = window.location.hostname || "localhost";
-    const wsUrl = `${proto}://${host}:5000/ws`;
+    // Optional: ?auto=<id> selects the vehicle stream (multi-vehicle setups)
+    const auto = new URLSearchParams(window.location.search).get("auto");
+    const wsUrl = `${proto}://${host}:5000/ws${auto ? `?auto=${encodeURIComponent(auto)}` : ""}`;
     const ws = new WebSocket(wsUrl);
 
     ws.onopen = () => {
@@ -536,8 +538,11 @@ export default function Dashboard({ theme }: DashboardProps) {
         
         if (data.RPM !== undefined) targetRpm = parseInt(data.RPM, 10);
         if (data.SPEED !== undefined) targetSpeed = parseInt(data.SPEED, 10);
-        // Shift indicator logic
-        if (targetRpm < 1000 && targetSpeed >= 20) {
+        // Shift indicator: computed on the Pi (DERIVED.SHIFT_HINT), local rule only for older backends
+        if (data.DERIVED && "SHIFT_HINT" in data.DERIVED) {
+          const hint = data.DERIVED.SHIFT_HINT;
+          setShiftIndicator(hint === "upshift" || hint === "downshift" ? hint : null);
+        } else if (targetRpm < 1000 && targetSpeed >= 20) {
           setShiftIndicator("downshift");
         } else if (targetRpm > 4000 && targetSpeed < 140) {
           setShiftIndicator("upshift");
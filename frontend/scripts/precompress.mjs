@@ -0,0 +1,33 @@
+// Komprimiert den Produktions-Build vor (gzip + brotli), damit das Backend
+// die Dateien ohne Laufzeit-Kompression mit Content-Encoding ausliefern kann.
+import { readdir, readFile, writeFile, stat } from "node:fs/promises";
+import { join, extname } from "node:path";
+import { gzipSync, brotliCompressSync, constants } from "node:zlib";
+
+const BUILD_DIR = process.argv[2] ?? "build/client";
+const COMPRESSIBLE = new Set([".html", ".js", ".mjs", ".css", ".json", ".svg", ".txt", ".map", ".webmanifest"]);
+const MIN_SIZE = 1024;
+
+async function* walk(dir) {
+  for (const entry of await readdir(dir, { withFileTypes: true })) {
+    const path = join(dir, entry.name);
+    if (entry.isDirectory()) yield* walk(path);
+    else yield path;
+  }
+}
+
+let count = 0;
+for await (const file of walk(BUILD_DIR)) {
+  if (!COMPRESSIBLE.has(extname(file)) || (await stat(file)).size < MIN_SIZE) continue;
+  const data = await readFile(file);
+  const variants = [
+    [".gz", gzipSync(data, { level: 9 })],
+    [".br", brotliCompressSync(data, { params: { [constants.BROTLI_PARAM_QUALITY]: 11 } })],
+  ];
+  for (const [suffix, compressed] of variants) {
+    // Nur behalten wenn die Variante tatsächlich kleiner ist
+    if (compressed.length < data.length) await writeFile(file + suffix, compressed);
+  }
+  count++;
+}
+console.log(`precompress: ${count} Dateien in ${BUILD_DIR} komprimiert`);